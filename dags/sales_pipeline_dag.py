@@ -1,7 +1,7 @@
 """
 dags/sales_pipeline_dag.py
 ==========================
-Airflow DAG: MinIO → Validate → Transform → PostgreSQL → Archive
+Airflow DAG: MinIO → Validate + Transform → PostgreSQL → Archive
 
 Processes three CSV file types per run:
   1. customers_*.csv  — customer dimension
@@ -14,24 +14,33 @@ Retry:    3 attempts with 2-minute back-off
 
 from __future__ import annotations
 
+import contextlib
 import logging
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from pathlib import Path
+from functools import lru_cache
 
 import boto3
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
 from airflow import DAG
 from airflow.operators.python import PythonOperator
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 
 # Airflow runs inside the container; include/ is on PYTHONPATH via volume mount
 from include.config import settings
 from include.db_loader import (
+    configure_bulk_load,
     get_connection,
     insert_returned_orders,
     log_pipeline_run,
+    refresh_pipeline_health,
+    set_run_output_key,
     update_customer_lifetime_values,
     upsert_categories,
     upsert_customers,
@@ -39,13 +48,22 @@ from include.db_loader import (
     upsert_products,
     upsert_purchased_products,
 )
+from include.storage import (
+    DOWNLOAD_MAX_CONCURRENCY,
+    classify_files,
+    list_pending_files,
+    parallel_download,
+)
 from include.transformations import (
-    build_product_aggregations,
+    REQUIRED_CUSTOMER_COLUMNS,
+    REQUIRED_PRODUCT_COLUMNS,
+    REQUIRED_SALES_COLUMNS,
     clean_and_transform,
     clean_customers,
     clean_products,
     extract_categories,
     extract_returns,
+    validate_schema,
 )
 
 logger = logging.getLogger(__name__)
@@ -61,39 +79,79 @@ DEFAULT_ARGS = {
     "execution_timeout": timedelta(minutes=30),
 }
 
+# Pending-file batching: every run loads all queued uploads (bounded)
+MAX_FILES_PER_TYPE = 50
+DOWNLOAD_FILE_CONCURRENCY = 4
+
+# Objects archived at once; each copy also runs its own TransferManager pool
+ARCHIVE_CONCURRENCY = 4
+
+# Low-cardinality columns decoded straight to Arrow dictionaries, so
+# normalisation only touches the unique values and Parquet stores them
+# dictionary-encoded (read back as pandas categoricals)
+DICTIONARY_COLUMNS = {
+    "customers": ("region",),
+    "products":  ("category",),
+    "sales":     ("status", "region"),
+}
+
+# zstd level for the Parquet intermediates: smaller than snappy, fast to read
+PARQUET_COMPRESSION_LEVEL = 3
+
+# Server-side archive copy: multipart UploadPartCopy above 64 MiB
+ARCHIVE_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=64 << 20,
+    multipart_chunksize=64 << 20,
+    max_concurrency=10,
+)
+
 # === Helpers =============================================================
 
 
+@lru_cache(maxsize=1)
 def _s3_client():
+    """
+    Shared S3 client for the worker process. Cached so the credential chain,
+    endpoint resolver and HTTP connection pool are built once and reused
+    across listing, downloading and archiving.
+    """
     return boto3.client(
         "s3",
         endpoint_url=settings.minio_endpoint,
         aws_access_key_id=settings.minio_root_user,
         aws_secret_access_key=settings.minio_root_password,
-        config=Config(signature_version="s3v4"),
+        config=Config(
+            signature_version="s3v4",
+            # One pooled connection per concurrent request, so neither the
+            # nested ranged GETs nor the archive copies churn connections
+            max_pool_connections=max(
+                DOWNLOAD_FILE_CONCURRENCY * DOWNLOAD_MAX_CONCURRENCY,
+                ARCHIVE_CONCURRENCY * ARCHIVE_TRANSFER_CONFIG.max_concurrency,
+            ),
+            retries={"max_attempts": 5, "mode": "adaptive"},
+            tcp_keepalive=True,
+        ),
         region_name="us-east-1",
     )
 
 
-def _list_pending_files() -> list[str]:
-    """Return all object keys in the raw-data bucket."""
-    client = _s3_client()
-    resp = client.list_objects_v2(Bucket=settings.minio_raw_bucket)
-    return [obj["Key"] for obj in resp.get("Contents", [])]
-
-
-def _classify_files(keys: list[str]) -> dict[str, str | None]:
-    """Classify files by prefix: customers, products, sales."""
-    result: dict[str, str | None] = {"customers": None, "products": None, "sales": None}
-    for key in keys:
-        basename = key.lower()
-        if basename.startswith("customers"):
-            result["customers"] = key
-        elif basename.startswith("products"):
-            result["products"] = key
-        elif basename.startswith("sales"):
-            result["sales"] = key
-    return result
+def _read_csv_object(object_key: str, file_type: str) -> pa.Table:
+    """
+    Fetch one raw CSV with parallel ranged GETs and parse it with Arrow.
+    `.csv.zst` objects are decompressed on the fly; plain `.csv` is still read.
+    """
+    raw = parallel_download(_s3_client(), settings.minio_raw_bucket, object_key)
+    source = pa.BufferReader(raw)
+    if object_key.endswith(".zst"):
+        source = pa.CompressedInputStream(source, "zstd")
+    dictionary_type = pa.dictionary(pa.int32(), pa.string())
+    return pv.read_csv(
+        source,
+        read_options=pv.ReadOptions(block_size=16 << 20),
+        convert_options=pv.ConvertOptions(
+            column_types={name: dictionary_type for name in DICTIONARY_COLUMNS[file_type]},
+        ),
+    )
 
 
 def _on_failure_callback(context: dict) -> None:
@@ -154,112 +212,91 @@ def run_data_generator(**context) -> None:
 
 
 def download_from_minio(**context) -> None:
-    """Download all pending CSVs (customers, products, sales) to temp files."""
-    all_files = _list_pending_files()
+    """
+    Download every pending CSV (customers, products, sales) concurrently and
+    combine each type into one Parquet file, so a backlog of uploads is
+    loaded in a single batch.
+    """
+    all_files = list_pending_files(_s3_client(), settings.minio_raw_bucket)
     if not all_files:
         raise ValueError("No files found in MinIO raw-data bucket.")
 
-    classified = _classify_files(all_files)
+    classified = classify_files(all_files, MAX_FILES_PER_TYPE)
     logger.info("Classified files: %s", classified)
 
-    client = _s3_client()
     local_paths: dict[str, str] = {}
 
-    for file_type, object_key in classified.items():
-        if object_key is None:
-            logger.warning("No %s file found in raw-data bucket.", file_type)
-            continue
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_FILE_CONCURRENCY) as pool:
+        futures = {
+            file_type: [pool.submit(_read_csv_object, key, file_type) for key in object_keys]
+            for file_type, object_keys in classified.items()
+        }
 
-        tmp = tempfile.NamedTemporaryFile(
-            suffix=".csv", delete=False, prefix=f"{file_type}_raw_"
-        )
-        client.download_fileobj(settings.minio_raw_bucket, object_key, tmp)
-        tmp.flush()
-        tmp.close()
-        local_paths[file_type] = tmp.name
-        logger.info("Downloaded %s → %s", object_key, tmp.name)
+        for file_type, object_keys in classified.items():
+            if not object_keys:
+                logger.warning("No %s file found in raw-data bucket.", file_type)
+                continue
+
+            # Tokenised once here; downstream tasks read columnar Parquet
+            table = pa.concat_tables(
+                [f.result() for f in futures[file_type]],
+                promote_options="permissive",
+            )
+
+            tmp = tempfile.NamedTemporaryFile(
+                suffix=".parquet", delete=False, prefix=f"{file_type}_raw_"
+            )
+            tmp.close()
+            pq.write_table(
+                table, tmp.name,
+                compression="zstd", compression_level=PARQUET_COMPRESSION_LEVEL,
+            )
+            local_paths[file_type] = tmp.name
+            logger.info(
+                "Downloaded %d %s file(s) → %s (%d rows)",
+                len(object_keys), file_type, tmp.name, table.num_rows,
+            )
 
     # Push all paths and keys via XCom
     ti = context["ti"]
     ti.xcom_push(key="classified_files", value=classified)
     ti.xcom_push(key="local_paths", value=local_paths)
-    ti.xcom_push(key="all_object_keys", value=[k for k in classified.values() if k])
-
-
-def validate_csv(**context) -> None:
-    """Validate each downloaded CSV against its expected schema."""
-    local_paths = context["ti"].xcom_pull(key="local_paths")
-
-    # Validate customers
-    if "customers" in local_paths:
-        df = pd.read_csv(local_paths["customers"])
-        if df.empty:
-            raise ValueError("Customers CSV is empty.")
-        required = {"customer_id", "name", "email", "region", "signup_date"}
-        missing = required - set(df.columns)
-        if missing:
-            raise ValueError(f"Customers CSV missing columns: {missing}")
-        logger.info("Customers validation passed: %d rows.", len(df))
-
-    # Validate products
-    if "products" in local_paths:
-        df = pd.read_csv(local_paths["products"])
-        if df.empty:
-            raise ValueError("Products CSV is empty.")
-        required = {"product_id", "name", "category", "unit_price", "cost"}
-        missing = required - set(df.columns)
-        if missing:
-            raise ValueError(f"Products CSV missing columns: {missing}")
-        logger.info("Products validation passed: %d rows.", len(df))
-
-    # Validate sales/transactions
-    if "sales" in local_paths:
-        df = pd.read_csv(local_paths["sales"])
-        if df.empty:
-            raise ValueError("Sales CSV is empty.")
-        required = {
-            "order_id", "customer_id", "product_id",
-            "quantity", "unit_price", "discount",
-            "order_date", "status", "region",
-        }
-        missing = required - set(df.columns)
-        if missing:
-            raise ValueError(f"Sales CSV missing columns: {missing}")
-        logger.info("Sales validation passed: %d rows.", len(df))
+    ti.xcom_push(key="all_object_keys", value=[k for keys in classified.values() for k in keys])
 
 
-def transform_data(**context) -> None:
-    """Clean & transform all CSVs; push cleaned parquet paths via XCom."""
+def validate_and_transform(**context) -> None:
+    """
+    Validate and clean every downloaded file in a single pass, so each file
+    is read once and the DataFrame stays in-process between the two steps.
+    Pushes cleaned parquet paths via XCom.
+    """
     local_paths = context["ti"].xcom_pull(key="local_paths")
     cleaned_paths: dict[str, str] = {}
     total_skipped = 0
 
-    # Transform customers
-    if "customers" in local_paths:
-        df_raw = pd.read_csv(local_paths["customers"])
-        df_clean, skipped = clean_customers(df_raw)
-        total_skipped += skipped
-        out = local_paths["customers"].replace(".csv", "_cleaned.parquet")
-        df_clean.to_parquet(out, index=False)
-        cleaned_paths["customers"] = out
-
-    # Transform products
-    if "products" in local_paths:
-        df_raw = pd.read_csv(local_paths["products"])
-        df_clean, skipped = clean_products(df_raw)
-        total_skipped += skipped
-        out = local_paths["products"].replace(".csv", "_cleaned.parquet")
-        df_clean.to_parquet(out, index=False)
-        cleaned_paths["products"] = out
-
-    # Transform sales/transactions
-    if "sales" in local_paths:
-        df_raw = pd.read_csv(local_paths["sales"])
-        df_clean, skipped = clean_and_transform(df_raw)
+    steps = [
+        ("customers", "Customers", REQUIRED_CUSTOMER_COLUMNS, clean_customers),
+        ("products", "Products", REQUIRED_PRODUCT_COLUMNS, clean_products),
+        ("sales", "Sales", REQUIRED_SALES_COLUMNS, clean_and_transform),
+    ]
+    for file_type, label, required, clean in steps:
+        if file_type not in local_paths:
+            continue
+
+        df_raw = pd.read_parquet(local_paths[file_type])
+        if df_raw.empty:
+            raise ValueError(f"{label} CSV is empty.")
+        validate_schema(df_raw, required, f"{label} CSV")
+        logger.info("%s validation passed: %d rows.", label, len(df_raw))
+
+        df_clean, skipped = clean(df_raw)
         total_skipped += skipped
-        out = local_paths["sales"].replace(".csv", "_cleaned.parquet")
-        df_clean.to_parquet(out, index=False)
-        cleaned_paths["sales"] = out
+        out = local_paths[file_type].replace(".parquet", "_cleaned.parquet")
+        df_clean.to_parquet(
+            out, index=False,
+            compression="zstd", compression_level=PARQUET_COMPRESSION_LEVEL,
+        )
+        cleaned_paths[file_type] = out
 
     context["ti"].xcom_push(key="cleaned_paths", value=cleaned_paths)
     context["ti"].xcom_push(key="rows_skipped", value=total_skipped)
@@ -280,8 +317,9 @@ def load_to_postgres(**context) -> None:
     total_rows_inserted = 0
 
     with get_connection() as conn:
+        configure_bulk_load(conn)
+
         # 1. Load products + extract categories
-        products_df = None
         category_map = {}
         if "products" in cleaned_paths:
             products_df = pd.read_parquet(cleaned_paths["products"])
@@ -306,10 +344,9 @@ def load_to_postgres(**context) -> None:
             if not returns_df.empty:
                 insert_returned_orders(returns_df, conn)
 
-            # 5. Build and upsert purchased_products aggregation
-            if products_df is not None:
-                agg_df = build_product_aggregations(orders_df, products_df)
-                upsert_purchased_products(agg_df, conn)
+            # 5. Aggregate purchased_products in SQL from the staged orders batch
+            if not orders_df.empty:
+                upsert_purchased_products(conn)
 
             # 6. Update customer lifetime values
             update_customer_lifetime_values(conn)
@@ -330,35 +367,56 @@ def load_to_postgres(**context) -> None:
     )
 
 
+def _archive_object(object_key: str) -> None:
+    """Server-side copy one object raw-data → processed-data, then delete the source."""
+    client = _s3_client()
+    # Managed copy: a single CopyObject for small files, parallel
+    # UploadPartCopy requests above the multipart threshold
+    client.copy(
+        CopySource={"Bucket": settings.minio_raw_bucket, "Key": object_key},
+        Bucket=settings.minio_processed_bucket,
+        Key=object_key,
+        ExtraArgs={"MetadataDirective": "COPY"},
+        Config=ARCHIVE_TRANSFER_CONFIG,
+    )
+    client.delete_object(Bucket=settings.minio_raw_bucket, Key=object_key)
+    logger.info("Archived '%s' → processed-data bucket.", object_key)
+
+
 def archive_file(**context) -> None:
     """Move all processed files from raw-data → processed-data bucket."""
     all_keys = context["ti"].xcom_pull(key="all_object_keys") or []
-    client = _s3_client()
 
-    for object_key in all_keys:
-        # Copy to processed bucket
-        client.copy_object(
-            Bucket=settings.minio_processed_bucket,
-            CopySource={"Bucket": settings.minio_raw_bucket, "Key": object_key},
-            Key=object_key,
-        )
-        # Delete from raw bucket
-        client.delete_object(Bucket=settings.minio_raw_bucket, Key=object_key)
-        logger.info("Archived '%s' → processed-data bucket.", object_key)
+    if all_keys:
+        with ThreadPoolExecutor(max_workers=min(len(all_keys), ARCHIVE_CONCURRENCY)) as pool:
+            list(pool.map(_archive_object, all_keys))
 
     # Cleanup temp files
     local_paths = context["ti"].xcom_pull(key="local_paths") or {}
     cleaned_paths = context["ti"].xcom_pull(key="cleaned_paths") or {}
     for paths in [local_paths, cleaned_paths]:
         for path in paths.values():
-            try:
-                Path(path).unlink(missing_ok=True)
-            except Exception:
-                pass
+            with contextlib.suppress(OSError):
+                os.unlink(path)
 
     logger.info("Archived %d files to processed-data bucket.", len(all_keys))
 
 
+def finalize_run(**context) -> None:
+    """
+    Record one archived key on the run's audit row and refresh the
+    pipeline_health flags. Both writes are idempotent and kept out of
+    archive_file, so a failure here retries on its own instead of
+    re-running copies whose raw-data sources are already deleted.
+    """
+    all_keys = context["ti"].xcom_pull(key="all_object_keys") or []
+    with get_connection() as conn:
+        if all_keys:
+            set_run_output_key(conn, context["run_id"], all_keys[0])
+        refresh_pipeline_health(conn)
+    logger.info("Refreshed pipeline_health.")
+
+
 # === DAG Definition =============================================
 with DAG(
     dag_id="sales_pipeline_dag",
@@ -382,14 +440,9 @@ with DAG(
         python_callable=download_from_minio,
     )
 
-    t_validate = PythonOperator(
-        task_id="validate_csv",
-        python_callable=validate_csv,
-    )
-
-    t_transform = PythonOperator(
-        task_id="transform_data",
-        python_callable=transform_data,
+    t_validate_transform = PythonOperator(
+        task_id="validate_and_transform",
+        python_callable=validate_and_transform,
     )
 
     t_load = PythonOperator(
@@ -402,5 +455,10 @@ with DAG(
         python_callable=archive_file,
     )
 
+    t_finalize = PythonOperator(
+        task_id="finalize_run",
+        python_callable=finalize_run,
+    )
+
     # === Task graph =============================================
-    t_generate >> t_download >> t_validate >> t_transform >> t_load >> t_archive
+    t_generate >> t_download >> t_validate_transform >> t_load >> t_archive >> t_finalize
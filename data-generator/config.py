@@ -1,53 +1,98 @@
 """
 data-generator/config.py
 =========================
-Minimal Pydantic settings used only by the data-generator container.
+Minimal settings used only by the data-generator container.
 Mirrors the relevant subset of include/config.py so the generator
-image stays lightweight (no psycopg2, no Airflow).
+image stays lightweight (no psycopg2, no Airflow, no Pydantic).
+
+A frozen dataclass read straight from os.environ / .env keeps
+start-up cheap for this short-lived tool. Environment variables
+take precedence over .env; every missing or invalid value is
+reported together in a single ValueError.
 """
 
 from __future__ import annotations
 
+import os
+from dataclasses import MISSING, dataclass, field, fields
 from functools import lru_cache
 
-from pydantic import Field, field_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
 
+def _load_env(path: str = ".env") -> dict[str, str]:
+    """Parse KEY=VALUE lines from a .env file; blanks and comments are skipped."""
+    values: dict[str, str] = {}
+    try:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                key, _, value = line.partition("=")
+                values[key.strip().upper()] = value.strip().strip("'\"")
+    except FileNotFoundError:
+        pass
+    return values
 
-class GeneratorSettings(BaseSettings):
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        case_sensitive=False,
-        extra="ignore",
-    )
 
-    minio_root_user:       str = Field(..., min_length=3)
-    minio_root_password:   str = Field(..., min_length=8)
-    minio_endpoint:        str = Field(...)
-    minio_raw_bucket:      str = Field("raw-data")
-    minio_processed_bucket: str = Field("processed-data")
+@dataclass(frozen=True, slots=True)
+class GeneratorSettings:
+    minio_root_user:       str = field(metadata={"min_length": 3})
+    minio_root_password:   str = field(metadata={"min_length": 8})
+    minio_endpoint:        str = field()
+    minio_raw_bucket:      str = "raw-data"
+    minio_processed_bucket: str = "processed-data"
 
     # Generator sizing
-    generator_num_customers:    int = Field(1000, ge=10, le=1_000_000)
-    generator_num_transactions: int = Field(10000, ge=50, le=10_000_000)
-    generator_seed:             int = Field(42)
+    generator_num_customers:    int = field(default=1000, metadata={"ge": 10, "le": 1_000_000})
+    generator_num_transactions: int = field(default=10000, metadata={"ge": 50, "le": 10_000_000})
+    generator_seed:             int = 42
 
     # Legacy fields (still accepted for backward compatibility)
-    generator_min_rows: int = Field(200, ge=1, le=1_000_000)
-    generator_max_rows: int = Field(1500, ge=1, le=1_000_000)
+    generator_min_rows: int = field(default=200, metadata={"ge": 1, "le": 1_000_000})
+    generator_max_rows: int = field(default=1500, metadata={"ge": 1, "le": 1_000_000})
+
+    def __post_init__(self) -> None:
+        errors = []
+        for f in fields(self):
+            value, rules = getattr(self, f.name), f.metadata
+            if "min_length" in rules and len(value) < rules["min_length"]:
+                errors.append(f"{f.name.upper()} must be at least {rules['min_length']} characters")
+            if "ge" in rules and not rules["ge"] <= value <= rules["le"]:
+                errors.append(f"{f.name.upper()} must be between {rules['ge']} and {rules['le']}")
+        if not self.minio_endpoint.startswith(("http://", "https://")):
+            errors.append("MINIO_ENDPOINT must start with http:// or https://")
+        if errors:
+            raise ValueError("Invalid generator settings:\n  " + "\n  ".join(errors))
+        object.__setattr__(self, "minio_endpoint", self.minio_endpoint.rstrip("/"))
 
-    @field_validator("minio_endpoint")
     @classmethod
-    def validate_endpoint(cls, v: str) -> str:
-        if not v.startswith(("http://", "https://")):
-            raise ValueError("MINIO_ENDPOINT must start with http:// or https://")
-        return v.rstrip("/")
+    def from_env(cls, env_file: str = ".env") -> GeneratorSettings:
+        """Read every field from os.environ (case-insensitive), then env_file."""
+        env = _load_env(env_file)
+        env.update((k.upper(), v) for k, v in os.environ.items())
+
+        kwargs, errors = {}, []
+        for f in fields(cls):
+            raw = env.get(f.name.upper())
+            if raw is None:
+                if f.default is MISSING:
+                    errors.append(f"{f.name.upper()} is required")
+                continue
+            if f.type == "int":
+                try:
+                    raw = int(raw)
+                except ValueError:
+                    errors.append(f"{f.name.upper()} must be an integer, got {raw!r}")
+                    continue
+            kwargs[f.name] = raw
+        if errors:
+            raise ValueError("Invalid generator settings:\n  " + "\n  ".join(errors))
+        return cls(**kwargs)
 
 
 @lru_cache(maxsize=1)
 def get_settings() -> GeneratorSettings:
-    return GeneratorSettings()
+    return GeneratorSettings.from_env()
 
 
 settings: GeneratorSettings = get_settings()
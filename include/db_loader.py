@@ -9,31 +9,195 @@ No Airflow imports — fully unit-testable in isolation.
 
 from __future__ import annotations
 
+import io
 import logging
+import struct
 from contextlib import contextmanager
+from functools import lru_cache
 from typing import Generator, Tuple
 
+import numpy as np
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 from include.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT statement for execute_values; Postgres throughput
+# plateaus around 10k rows per statement
+PAGE_SIZE = 10_000
+
+
+@lru_cache(maxsize=1)
+def _pool() -> psycopg2.pool.ThreadedConnectionPool:
+    """
+    Process-wide connection pool, created on first use (not at import, so
+    DAG parsing and unit tests never open a connection).
+    """
+    return psycopg2.pool.ThreadedConnectionPool(
+        1, 8,
+        dsn=settings.postgres_dsn,
+        keepalives=1,
+        keepalives_idle=30,
+    )
+
 
 @contextmanager
 def get_connection() -> Generator[psycopg2.extensions.connection, None, None]:
-    """Context-managed psycopg2 connection with auto-rollback on error."""
-    conn = psycopg2.connect(settings.postgres_dsn)
+    """Context-managed pooled psycopg2 connection with auto-rollback on error."""
+    pool = _pool()
+    conn = pool.getconn()
     try:
         yield conn
         conn.commit()
     except Exception:
-        conn.rollback()
+        if not conn.closed:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        # Broken connections are discarded rather than returned to the pool
+        pool.putconn(conn, close=bool(conn.closed))
+
+
+def configure_bulk_load(conn: psycopg2.extensions.connection) -> None:
+    """
+    Apply transaction-scoped settings for a bulk load. SET LOCAL reverts at
+    commit/rollback, so pooled connections are returned unchanged.
+    """
+    with conn.cursor() as cur:
+        # Don't wait for the WAL flush at commit. A server crash can lose a
+        # just-acknowledged load, but never leaves one partially applied
+        cur.execute("SET LOCAL synchronous_commit = off;")
+        cur.execute("SET LOCAL work_mem = '128MB';")
+        cur.execute("SET LOCAL maintenance_work_mem = '512MB';")
+
+
+# === Bulk-insert helpers ==========================================
+
+
+def _values_template(columns: list[str]) -> str:
+    """Explicit execute_values row template, e.g. '(%s, %s, %s)'."""
+    return f"({', '.join(['%s'] * len(columns))})"
+
+
+# staging_orders wire types for COPY BINARY. Prices are staged as float8
+# (NUMERIC's binary form is base-10000 digit groups) and cast to NUMERIC
+# by the INSERT ... SELECT into orders.
+ORDERS_COPY_SCHEMA: dict[str, str] = {
+    "order_id":    "text",
+    "customer_id": "text",
+    "product_id":  "text",
+    "quantity":    "int4",
+    "unit_price":  "float8",
+    "discount":    "float8",
+    "order_date":  "date",
+    "status":      "text",
+    "region":      "text",
+}
+
+_PG_TYPES = {"text": "text", "int4": "integer", "float8": "double precision", "date": "date"}
+_FIXED_WIDTH_DTYPES = {"int4": ">i4", "float8": ">f8", "date": ">i4"}
+
+# Signature, flags and header-extension length; the trailer is a -1 field count
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack(">h", -1)
+# Days from the Unix epoch to the Postgres date epoch (2000-01-01)
+_PG_EPOCH_DAYS = 10_957
+
+
+def _create_staging_table(
+    conn: psycopg2.extensions.connection,
+    staging: str,
+    schema: dict[str, str],
+) -> None:
+    """Create a transaction-scoped temp table with the given COPY wire types."""
+    columns = ", ".join(f"{name} {_PG_TYPES[kind]}" for name, kind in schema.items())
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TEMP TABLE {staging} ({columns}) ON COMMIT DROP;")
+
+
+def _fixed_width_binary(values: np.ndarray) -> pa.Array:
+    """
+    View a contiguous NumPy array as one binary value per element. Values
+    are large_binary (int64 offsets) so a joined batch can exceed 2 GiB.
+    """
+    values = np.ascontiguousarray(values)
+    return pa.Array.from_buffers(
+        pa.binary(values.dtype.itemsize), len(values), [None, pa.py_buffer(values)],
+    ).cast(pa.large_binary())
+
+
+def _binary_fields(series: pd.Series, kind: str) -> Tuple[pa.Array, pa.Array]:
+    """
+    Encode one column as COPY BINARY fields: (big-endian int32 length,
+    payload). NULLs get length -1 and an empty payload.
+    """
+    arr = pa.array(series, from_pandas=True)
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    if pa.types.is_dictionary(arr.type):
+        arr = arr.dictionary_decode()
+    nulls = arr.is_null().to_numpy(zero_copy_only=False)
+
+    if kind == "text":
+        payload = pc.fill_null(arr.cast(pa.string()), "").cast(pa.large_binary())
+        lengths = pc.binary_length(payload).to_numpy(zero_copy_only=False).astype(">i4")
+    else:
+        if kind == "date":
+            values = pc.subtract(arr.cast(pa.date32()).cast(pa.int32()), _PG_EPOCH_DAYS)
+        elif kind == "int4":
+            values = arr.cast(pa.int32())
+        else:
+            values = arr.cast(pa.float64())
+        values = pc.fill_null(values, 0).to_numpy(zero_copy_only=False)
+        values = values.astype(_FIXED_WIDTH_DTYPES[kind])
+        payload = pc.if_else(
+            pa.array(nulls), pa.scalar(b"", pa.large_binary()), _fixed_width_binary(values),
+        )
+        lengths = np.full(len(arr), values.dtype.itemsize, dtype=">i4")
+
+    lengths[nulls] = -1
+    return _fixed_width_binary(lengths), payload
+
+
+def _orders_binary_writer(df: pd.DataFrame) -> io.BytesIO:
+    """
+    Serialize df into a PGCOPY stream shaped by ORDERS_COPY_SCHEMA.
+    Works column-at-a-time: each column becomes (length, payload) binary
+    arrays and Arrow joins them row-wise, so no per-cell Python formatting.
+    """
+    parts = [_fixed_width_binary(np.full(len(df), len(ORDERS_COPY_SCHEMA), dtype=">i2"))]
+    for name, kind in ORDERS_COPY_SCHEMA.items():
+        parts.extend(_binary_fields(df[name], kind))
+    rows = pc.binary_join_element_wise(*parts, pa.scalar(b"", pa.large_binary()))
+
+    buf = io.BytesIO()
+    buf.write(_PGCOPY_HEADER)
+    if len(rows):
+        offsets = np.frombuffer(rows.buffers()[1], dtype=np.int64)
+        offsets = offsets[rows.offset: rows.offset + len(rows) + 1]
+        buf.write(memoryview(rows.buffers()[2])[offsets[0]:offsets[-1]])
+    buf.write(_PGCOPY_TRAILER)
+    buf.seek(0)
+    return buf
+
+
+def _copy_binary(
+    buf: io.BytesIO,
+    table: str,
+    conn: psycopg2.extensions.connection,
+    columns: list[str],
+) -> None:
+    """Stream a PGCOPY buffer into `table` with a single COPY FROM STDIN."""
+    with conn.cursor() as cur:
+        cur.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT BINARY)", buf,
+        )
 
 
 # === Product Categories ==========================================
@@ -49,7 +213,8 @@ def upsert_categories(
     if df.empty:
         return {}
 
-    records = [(row["name"], row["description"]) for _, row in df.iterrows()]
+    columns = ["name", "description"]
+    records = df[columns].itertuples(index=False, name=None)
 
     sql = """
         INSERT INTO product_categories (name, description)
@@ -60,7 +225,9 @@ def upsert_categories(
         ;
     """
     with conn.cursor() as cur:
-        psycopg2.extras.execute_values(cur, sql, records, page_size=100)
+        psycopg2.extras.execute_values(
+            cur, sql, records, template=_values_template(columns), page_size=PAGE_SIZE,
+        )
         results = cur.fetchall()
 
     # Also fetch any existing rows not returned by the upsert
@@ -102,7 +269,7 @@ def upsert_products(
     df["category_id"] = df["category_id"].astype(int)
 
     columns = ["product_id", "name", "category_id", "unit_price", "cost"]
-    records = [tuple(row[col] for col in columns) for _, row in df.iterrows()]
+    records = df[columns].itertuples(index=False, name=None)
 
     sql = f"""
         INSERT INTO products ({', '.join(columns)})
@@ -115,7 +282,9 @@ def upsert_products(
         ;
     """
     with conn.cursor() as cur:
-        psycopg2.extras.execute_values(cur, sql, records, page_size=500)
+        psycopg2.extras.execute_values(
+            cur, sql, records, template=_values_template(columns), page_size=PAGE_SIZE,
+        )
         rows_affected = cur.rowcount
 
     logger.info("Upserted %d product rows.", rows_affected)
@@ -138,7 +307,7 @@ def upsert_customers(
         return 0
 
     columns = ["customer_id", "name", "email", "region", "signup_date", "lifetime_value"]
-    records = [tuple(row[col] for col in columns) for _, row in df.iterrows()]
+    records = df[columns].itertuples(index=False, name=None)
 
     sql = f"""
         INSERT INTO customers ({', '.join(columns)})
@@ -151,7 +320,9 @@ def upsert_customers(
         ;
     """
     with conn.cursor() as cur:
-        psycopg2.extras.execute_values(cur, sql, records, page_size=500)
+        psycopg2.extras.execute_values(
+            cur, sql, records, template=_values_template(columns), page_size=PAGE_SIZE,
+        )
         rows_affected = cur.rowcount
 
     logger.info("Upserted %d customer rows.", rows_affected)
@@ -175,17 +346,15 @@ def upsert_orders(
         logger.warning("upsert_orders called with empty DataFrame — nothing to do.")
         return 0, 0
 
-    columns = [
-        "order_id", "customer_id", "product_id",
-        "quantity", "unit_price", "discount",
-        "order_date", "status", "region",
-    ]
+    columns = list(ORDERS_COPY_SCHEMA)
 
-    records = [tuple(row[col] for col in columns) for _, row in df.iterrows()]
+    # Stage via COPY BINARY, then upsert in one set-based statement
+    _create_staging_table(conn, "staging_orders", ORDERS_COPY_SCHEMA)
+    _copy_binary(_orders_binary_writer(df), "staging_orders", conn, columns)
 
     sql = f"""
         INSERT INTO orders ({', '.join(columns)})
-        VALUES %s
+        SELECT {', '.join(columns)} FROM staging_orders
         ON CONFLICT (order_id) DO UPDATE SET
             customer_id  = EXCLUDED.customer_id,
             product_id   = EXCLUDED.product_id,
@@ -200,7 +369,7 @@ def upsert_orders(
     """
 
     with conn.cursor() as cur:
-        psycopg2.extras.execute_values(cur, sql, records, page_size=500)
+        cur.execute(sql)
         rows_affected = cur.rowcount
 
     rows_inserted = rows_affected
@@ -239,7 +408,7 @@ def insert_returned_orders(
         return 0
 
     columns = ["order_id", "return_reason", "return_date", "refund_amount"]
-    records = [tuple(row[col] for col in columns) for _, row in df.iterrows()]
+    records = df[columns].itertuples(index=False, name=None)
 
     sql = f"""
         INSERT INTO returned_orders ({', '.join(columns)})
@@ -247,7 +416,9 @@ def insert_returned_orders(
         ;
     """
     with conn.cursor() as cur:
-        psycopg2.extras.execute_values(cur, sql, records, page_size=500)
+        psycopg2.extras.execute_values(
+            cur, sql, records, template=_values_template(columns), page_size=PAGE_SIZE,
+        )
         rows_affected = cur.rowcount
 
     logger.info("Inserted %d returned order records.", rows_affected)
@@ -257,41 +428,46 @@ def insert_returned_orders(
 # === Purchased Products (aggregation) ==========================================
 
 
-def upsert_purchased_products(
-    agg_df: pd.DataFrame,
-    conn: psycopg2.extensions.connection,
-) -> None:
-    """Upsert the purchased_products aggregation table."""
-    if agg_df.empty:
-        return
-
-    columns = [
-        "product_id", "product_name", "category_name",
-        "total_units_sold", "total_revenue", "avg_discount",
-        "last_purchased_date",
-    ]
-    records = [tuple(row[col] for col in columns) for _, row in agg_df.iterrows()]
-
+def upsert_purchased_products(conn: psycopg2.extensions.connection) -> int:
+    """
+    Aggregate the orders batch staged by `upsert_orders` into purchased_products.
+    Must run on the same connection/transaction, after `upsert_orders`.
+    Returns number of product rows upserted.
+    """
     with conn.cursor() as cur:
-        psycopg2.extras.execute_values(
-            cur,
-            f"""
-                INSERT INTO purchased_products ({', '.join(columns)}, updated_at)
-                VALUES %s
-                ON CONFLICT (product_id) DO UPDATE SET
-                    product_name        = EXCLUDED.product_name,
-                    category_name       = EXCLUDED.category_name,
-                    total_units_sold    = purchased_products.total_units_sold + EXCLUDED.total_units_sold,
-                    total_revenue       = purchased_products.total_revenue    + EXCLUDED.total_revenue,
-                    avg_discount        = EXCLUDED.avg_discount,
-                    last_purchased_date = GREATEST(purchased_products.last_purchased_date, EXCLUDED.last_purchased_date),
-                    updated_at          = NOW()
-            """,
-            records,
-            template="(%s, %s, %s, %s, %s, %s, %s, NOW())",
-            page_size=500,
-        )
-    logger.info("Upserted %d product aggregation rows.", len(agg_df))
+        cur.execute("""
+            INSERT INTO purchased_products (
+                product_id, product_name, category_name,
+                total_units_sold, total_revenue, avg_discount,
+                last_purchased_date, updated_at
+            )
+            SELECT
+                s.product_id,
+                p.name,
+                c.name,
+                SUM(s.quantity),
+                ROUND(SUM(ROUND(s.quantity * s.unit_price::NUMERIC(10, 2)
+                                * (1 - s.discount::NUMERIC(5, 4)), 2)), 2),
+                ROUND(AVG(s.discount::NUMERIC(5, 4)), 4),
+                MAX(s.order_date),
+                NOW()
+            FROM staging_orders s
+            JOIN products p           ON p.product_id  = s.product_id
+            JOIN product_categories c ON c.category_id = p.category_id
+            GROUP BY s.product_id, p.name, c.name
+            ON CONFLICT (product_id) DO UPDATE SET
+                product_name        = EXCLUDED.product_name,
+                category_name       = EXCLUDED.category_name,
+                total_units_sold    = purchased_products.total_units_sold + EXCLUDED.total_units_sold,
+                total_revenue       = purchased_products.total_revenue    + EXCLUDED.total_revenue,
+                avg_discount        = EXCLUDED.avg_discount,
+                last_purchased_date = GREATEST(purchased_products.last_purchased_date, EXCLUDED.last_purchased_date),
+                updated_at          = NOW()
+            ;
+        """)
+        rows_affected = cur.rowcount
+    logger.info("Upserted %d product aggregation rows.", rows_affected)
+    return rows_affected
 
 
 # === Customer Lifetime Value ==========================================
@@ -315,6 +491,16 @@ def update_customer_lifetime_values(conn: psycopg2.extensions.connection) -> Non
     logger.info("Updated lifetime_value for %d customers.", rows)
 
 
+# === Pipeline Health ==========================================
+
+
+def refresh_pipeline_health(conn: psycopg2.extensions.connection) -> None:
+    """Recompute the pipeline_health materialized view (one row of flags)."""
+    with conn.cursor() as cur:
+        cur.execute("REFRESH MATERIALIZED VIEW pipeline_health;")
+    logger.info("Refreshed pipeline_health.")
+
+
 # === Pipeline Audit Log ==========================================
 
 
@@ -335,8 +521,25 @@ def log_pipeline_run(
             VALUES (%s, %s, %s, %s, %s, NOW())
             RETURNING run_id
             """,
-            (dag_run_id, file_processed, rows_inserted, rows_skipped, status),
+            # file_processed is VARCHAR(500); a batched run can list many keys
+            (dag_run_id, file_processed[:500], rows_inserted, rows_skipped, status),
         )
         run_id = cur.fetchone()[0]
     logger.info("Logged pipeline_run #%d — status=%s", run_id, status)
     return run_id
+
+
+def set_run_output_key(
+    conn: psycopg2.extensions.connection,
+    dag_run_id: str,
+    output_key: str,
+) -> None:
+    """Record the processed-data object key on the run's successful audit row."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE pipeline_runs SET output_key = %s
+            WHERE dag_run_id = %s AND status = 'success'
+            """,
+            (output_key, dag_run_id),
+        )
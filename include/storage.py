@@ -0,0 +1,80 @@
+"""
+include/storage.py
+==================
+MinIO object helpers for the sales pipeline: listing and batching the
+pending raw files, and parallel ranged-GET downloads.
+No Airflow imports — fully unit-testable in isolation.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Ranged-GET download tuning
+DOWNLOAD_CHUNK_SIZE = 4 << 20      # 4 MiB per ranged GET
+DOWNLOAD_MAX_CONCURRENCY = 16
+
+
+def parallel_download(
+    client,
+    bucket: str,
+    key: str,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    max_concurrency: int = DOWNLOAD_MAX_CONCURRENCY,
+) -> bytearray:
+    """
+    Download one object with concurrent ranged GETs into a pre-allocated buffer.
+    Each worker writes its byte range straight into a memoryview slice.
+    """
+    total_size = client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+    buf = bytearray(total_size)
+    view = memoryview(buf)
+
+    def _fetch(start: int) -> None:
+        end = min(start + chunk_size, total_size) - 1
+        resp = client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")
+        view[start:end + 1] = resp["Body"].read()
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        # list() re-raises the first worker exception, if any
+        list(pool.map(_fetch, range(0, total_size, chunk_size)))
+    return buf
+
+
+def list_pending_files(client, bucket: str) -> list[str]:
+    """
+    Return every object key in `bucket`. Paginated, so a backlog beyond
+    the 1000-key ListObjectsV2 page is listed in full.
+    """
+    paginator = client.get_paginator("list_objects_v2")
+    return [
+        obj["Key"]
+        for page in paginator.paginate(Bucket=bucket)
+        for obj in page.get("Contents", [])
+    ]
+
+
+def classify_files(keys: list[str], max_per_type: int) -> dict[str, list[str]]:
+    """
+    Group files by prefix: customers, products, sales. Timestamped names sort
+    chronologically, so the oldest `max_per_type` keys per type are taken
+    first and later uploads wait for the next run, never overwriting newer
+    rows. Each batch is then ordered newest first, so de-duplication
+    downstream keeps the latest record.
+    """
+    result: dict[str, list[str]] = {"customers": [], "products": [], "sales": []}
+    for key in sorted(keys):
+        basename = key.lower()
+        if basename.startswith("customers"):
+            file_type = "customers"
+        elif basename.startswith("products"):
+            file_type = "products"
+        elif basename.startswith("sales"):
+            file_type = "sales"
+        else:
+            continue
+        if len(result[file_type]) < max_per_type:
+            result[file_type].append(key)
+    for batch in result.values():
+        batch.reverse()
+    return result
@@ -2,19 +2,25 @@
 include/transformations.py
 ==========================
 Pure-Python / Pandas transformation logic for the sales pipeline.
-Handles customers, products, transactions, returns, and product aggregations.
+Handles customers, products, transactions, returns, and categories.
+String normalisation runs through PyArrow compute kernels.
 No Airflow imports — fully unit-testable in isolation.
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Tuple
+from typing import Callable, Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
 logger = logging.getLogger(__name__)
 
+# Calendar-date columns are held as Arrow date32 end-to-end
+DATE_DTYPE = pd.ArrowDtype(pa.date32())
+
 # === Required column schemas per entity ==========================
 
 REQUIRED_SALES_COLUMNS = {
@@ -42,6 +48,58 @@ def validate_schema(df: pd.DataFrame, required: set[str], entity: str = "CSV") -
         raise ValueError(f"{entity} is missing required columns: {missing}")
 
 
+# === Text normalisation ==========================================
+
+
+def _normalise_text(series: pd.Series, *kernels: Callable[[pa.Array], pa.Array]) -> pd.Series:
+    """
+    Apply PyArrow string kernels (e.g. pc.utf8_trim_whitespace, pc.utf8_title)
+    to a column in native code instead of per-element Python `.str` calls.
+    Nulls are preserved. Arrow-backed input (pd.ArrowDtype, string[pyarrow])
+    stays Arrow-backed; anything else comes back as object dtype.
+    """
+    arr = pa.array(series, type=pa.string(), from_pandas=True)
+    for kernel in kernels:
+        arr = kernel(arr)
+
+    if isinstance(series.dtype, pd.ArrowDtype):
+        values = pd.arrays.ArrowExtensionArray(arr)
+    elif isinstance(series.dtype, pd.StringDtype) and series.dtype.storage == "pyarrow":
+        values = pd.arrays.ArrowStringArray(arr)
+    else:
+        # set_axis, not Series(..., index=...): the latter would realign by label
+        return arr.to_pandas().set_axis(series.index).rename(series.name)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def _normalise_categorical(
+    series: pd.Series,
+    *kernels: Callable[[pa.Array], pa.Array],
+) -> pd.Series:
+    """
+    `_normalise_text` for low-cardinality columns (region, status, category).
+    Works on an Arrow dictionary array (encoded here unless the column
+    already is one), so the kernels run over the unique values only.
+    Values that collapse together after normalisation (e.g. " europe" and
+    "Europe") share one dictionary entry. Returns a pandas categorical.
+    """
+    arr = pa.array(series, from_pandas=True)
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    if not pa.types.is_dictionary(arr.type):
+        arr = pc.dictionary_encode(arr.cast(pa.string()))
+
+    dictionary = arr.dictionary.cast(pa.string())
+    for kernel in kernels:
+        dictionary = kernel(dictionary)
+    # Re-encode the normalised dictionary: old entry → deduplicated entry
+    remap = pc.dictionary_encode(dictionary)
+    result = pa.DictionaryArray.from_arrays(
+        pc.take(remap.indices, arr.indices), remap.dictionary,
+    )
+    return result.to_pandas().set_axis(series.index).rename(series.name)
+
+
 # === Customer transforms ==========================================
 
 
@@ -69,12 +127,12 @@ def clean_customers(df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
         logger.warning("Dropped %d customer rows with null critical fields.", rows_dropped)
 
     # Normalise text
-    df["region"] = df["region"].str.strip().str.title()
-    df["name"] = df["name"].str.strip()
-    df["email"] = df["email"].str.strip().str.lower()
+    df["region"] = _normalise_categorical(df["region"], pc.utf8_trim_whitespace, pc.utf8_title)
+    df["name"] = _normalise_text(df["name"], pc.utf8_trim_whitespace)
+    df["email"] = _normalise_text(df["email"], pc.utf8_trim_whitespace, pc.utf8_lower)
 
-    # Cast date
-    df["signup_date"] = df["signup_date"].dt.date
+    # Cast date (Arrow date32: 4 bytes/row, no Python date objects)
+    df["signup_date"] = df["signup_date"].astype(DATE_DTYPE)
 
     # Add lifetime_value placeholder (updated after orders load)
     if "lifetime_value" not in df.columns:
@@ -113,8 +171,8 @@ def clean_products(df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
         logger.warning("Dropped %d product rows with null critical fields.", rows_dropped)
 
     # Normalise text
-    df["category"] = df["category"].str.strip().str.title()
-    df["name"] = df["name"].str.strip()
+    df["category"] = _normalise_categorical(df["category"], pc.utf8_trim_whitespace, pc.utf8_title)
+    df["name"] = _normalise_text(df["name"], pc.utf8_trim_whitespace)
 
     rows_skipped = original_len - len(df)
     logger.info("Products: %d kept, %d skipped.", len(df), rows_skipped)
@@ -153,8 +211,8 @@ def clean_and_transform(df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
         logger.warning("Dropped %d rows with null critical fields.", rows_dropped)
 
     # Normalise text fields
-    df["region"] = df["region"].str.strip().str.title()
-    df["status"] = df["status"].str.strip().str.lower()
+    df["region"] = _normalise_categorical(df["region"], pc.utf8_trim_whitespace, pc.utf8_title)
+    df["status"] = _normalise_categorical(df["status"], pc.utf8_trim_whitespace, pc.utf8_lower)
 
     # Compute revenue (also stored in PG as a generated column,
     # but persisted here for validation ease)
@@ -162,8 +220,9 @@ def clean_and_transform(df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
         df["quantity"] * df["unit_price"] * (1 - df["discount"])
     ).round(2)
 
-    # Cast order_date to plain date for PG DATE type
-    df["order_date"] = df["order_date"].dt.date
+    # Cast order_date to Arrow date32 for PG DATE type; stays date32
+    # through the Parquet hand-off instead of a Python-object column
+    df["order_date"] = df["order_date"].astype(DATE_DTYPE)
 
     rows_skipped = original_len - len(df)
     logger.info(
@@ -204,39 +263,6 @@ def extract_returns(df: pd.DataFrame) -> pd.DataFrame:
     return result
 
 
-# === Product-level aggregation ==========================================
-
-
-def build_product_aggregations(
-    orders_df: pd.DataFrame,
-    products_df: pd.DataFrame,
-) -> pd.DataFrame:
-    """
-    Compute the purchased_products aggregation from cleaned orders + products.
-    """
-    # Merge to get product name and category
-    merged = orders_df.merge(
-        products_df[["product_id", "name", "category"]],
-        on="product_id",
-        how="left",
-    )
-
-    agg = (
-        merged.groupby(["product_id", "name", "category"])
-        .agg(
-            total_units_sold=("quantity", "sum"),
-            total_revenue=("total_revenue", "sum"),
-            avg_discount=("discount", "mean"),
-            last_purchased_date=("order_date", "max"),
-        )
-        .reset_index()
-    )
-    agg.rename(columns={"name": "product_name", "category": "category_name"}, inplace=True)
-    agg["total_revenue"] = agg["total_revenue"].round(2)
-    agg["avg_discount"] = agg["avg_discount"].round(4)
-    return agg
-
-
 # === Extract distinct categories ==========================================
 
 
@@ -0,0 +1,25 @@
+/* ================================================================
+-- Sales Data Platform — pipeline health flags
+-- ================================================================
+-- Runs after 01_schema.sql on first container start. Existing
+-- volumes can apply it by hand:
+--     psql -U sales_user -d sales -f init-scripts/02_pipeline_health.sql
+-- ================================================================*/
+\connect sales
+
+-- 8. PIPELINE_HEALTH — data-quality flags (materialized view)
+--    Refreshed by the Airflow pipeline at the end of each run, so
+--    health checks read one precomputed row instead of scanning.
+--    EXISTS stops at the first matching row; no full counts needed.
+-- ================================================================
+CREATE MATERIALIZED VIEW IF NOT EXISTS pipeline_health AS
+SELECT
+    EXISTS (SELECT 1 FROM orders)                                          AS has_orders,
+    EXISTS (SELECT 1 FROM orders
+             WHERE total_revenue <= 0 AND status = 'completed')            AS has_bad_revenue_orders,
+    EXISTS (SELECT 1 FROM purchased_products)                              AS has_purchased_products,
+    EXISTS (SELECT 1 FROM pipeline_runs WHERE status = 'success')          AS has_successful_runs,
+    EXISTS (SELECT 1 FROM orders
+             WHERE order_date IS NULL OR order_date > CURRENT_DATE)        AS has_bad_date_orders,
+    EXISTS (SELECT 1 FROM orders WHERE order_id IS NULL)                   AS has_null_order_ids,
+    NOW()                                                                  AS refreshed_at;
@@ -0,0 +1,12 @@
+/* ================================================================
+-- Sales Data Platform — pipeline_runs.output_key
+-- ================================================================
+-- Runs after 02_pipeline_health.sql on first container start.
+-- Existing volumes can apply it by hand:
+--     psql -U sales_user -d sales -f init-scripts/03_pipeline_runs_output_key.sql
+-- ================================================================*/
+\connect sales
+
+-- Object key the run archived into the processed-data bucket, so
+-- checks can HEAD that exact object instead of listing the bucket.
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS output_key VARCHAR(1024);
@@ -0,0 +1,16 @@
+/* ================================================================
+-- Sales Data Platform — partial index for the revenue check
+-- ================================================================
+-- Runs after 03_pipeline_runs_output_key.sql on first container
+-- start. Existing volumes can apply it by hand:
+--     psql -U sales_user -d sales -f init-scripts/04_orders_bad_revenue_index.sql
+-- ================================================================*/
+\connect sales
+
+-- Covers only completed orders with non-positive revenue, which
+-- should never exist. The has_bad_revenue_orders EXISTS in
+-- pipeline_health becomes an index probe on an empty index instead
+-- of a sequential scan of orders on every refresh.
+CREATE INDEX IF NOT EXISTS idx_orders_bad_revenue
+    ON orders (status)
+    WHERE total_revenue <= 0 AND status = 'completed';
@@ -0,0 +1,209 @@
+"""
+tests/conftest.py
+=================
+Shared fixtures for the data-flow suite: MinIO / PostgreSQL clients,
+the pipeline_health snapshot and sample DataFrames for the unit tests.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+import psycopg2
+import pytest
+import urllib3
+from minio import Minio
+
+# Allow importing include/ from project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from include.config import settings
+
+
+# == Prepared queries ===========================================
+
+DbStats = namedtuple("DbStats", [
+    "has_orders",
+    "has_bad_revenue_orders",
+    "has_purchased_products",
+    "has_successful_runs",
+    "has_bad_date_orders",
+    "has_null_order_ids",
+])
+
+
+# Test queries, prepared once per connection by pg_conn and run with
+# EXECUTE <name>, so Postgres parses and plans each of them only once
+PREPARED_QUERIES = {
+    "categories_exist":
+        "SELECT EXISTS (SELECT 1 FROM product_categories)",
+    "duplicate_categories":
+        "SELECT name, COUNT(*) FROM product_categories GROUP BY name HAVING COUNT(*) > 1",
+    "products_count":
+        "SELECT COUNT(*) FROM products",
+    "negative_margin_products":
+        "SELECT COUNT(*) FROM products WHERE margin < 0",
+    "orphan_products": """
+        SELECT COUNT(*) FROM products p
+        WHERE NOT EXISTS (
+            SELECT 1 FROM product_categories c WHERE c.category_id = p.category_id
+        )
+    """,
+    "customers_exist":
+        "SELECT EXISTS (SELECT 1 FROM customers)",
+    "null_customer_ids":
+        "SELECT COUNT(*) FROM customers WHERE customer_id IS NULL",
+    "invalid_emails":
+        "SELECT COUNT(*) FROM customers WHERE email NOT LIKE '%@%'",
+    "orphan_order_customers": """
+        SELECT COUNT(*) FROM orders o
+        WHERE NOT EXISTS (
+            SELECT 1 FROM customers c WHERE c.customer_id = o.customer_id
+        )
+    """,
+    "orphan_order_products": """
+        SELECT COUNT(*) FROM orders o
+        WHERE NOT EXISTS (
+            SELECT 1 FROM products p WHERE p.product_id = o.product_id
+        )
+    """,
+    "returned_orders_exist":
+        "SELECT EXISTS (SELECT 1 FROM returned_orders)",
+    "orphan_returns": """
+        SELECT COUNT(*) FROM returned_orders r
+        WHERE NOT EXISTS (
+            SELECT 1 FROM orders o WHERE o.order_id = r.order_id
+        )
+    """,
+    "negative_refunds":
+        "SELECT COUNT(*) FROM returned_orders WHERE refund_amount < 0",
+    "non_positive_product_revenue":
+        "SELECT COUNT(*) FROM purchased_products WHERE total_revenue <= 0",
+    "latest_output_key":
+        "SELECT output_key FROM pipeline_runs WHERE output_key IS NOT NULL"
+        " ORDER BY run_id DESC LIMIT 1",
+    "pipeline_health":
+        f"SELECT {', '.join(DbStats._fields)} FROM pipeline_health",
+}
+
+
+# == Fixtures ===================================================
+
+
+@pytest.fixture(scope="session")
+def minio_client():
+    # One client per xdist worker. minio-py skips botocore's service-model
+    # loading, so start-up is cheap; the keep-alive pool is reused across
+    # every MinIO test that worker runs
+    endpoint = urlsplit(settings.minio_endpoint)
+    return Minio(
+        endpoint.netloc,
+        access_key=settings.minio_root_user,
+        secret_key=settings.minio_root_password,
+        secure=endpoint.scheme == "https",
+        region="us-east-1",
+        http_client=urllib3.PoolManager(
+            maxsize=32,
+            # A custom PoolManager drops minio-py's default timeouts; without
+            # them a hung MinIO blocks the run until the CI job limit
+            timeout=urllib3.Timeout(connect=10, read=60),
+            retries=urllib3.Retry(
+                total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504],
+            ),
+        ),
+    )
+
+
+@pytest.fixture(scope="session")
+def pg_conn():
+    """
+    Read-only connection holding one REPEATABLE READ transaction for the
+    whole session, so every test on this xdist worker sees the same
+    snapshot even if the DAG writes meanwhile.
+
+    The snapshot is per worker, not per run: each worker opens its own
+    connection, so tests on different workers can see different states.
+    Checks that compare results with each other must share a test class,
+    which `--dist loadscope` keeps on one worker.
+
+    Each worker opens exactly one backend, closed explicitly at session
+    end; a pool would only ever lend this one connection and cannot bound
+    backends across worker processes.
+    """
+    conn = psycopg2.connect(settings.postgres_dsn)
+    conn.set_session(
+        isolation_level=psycopg2.extensions.ISOLATION_LEVEL_REPEATABLE_READ,
+        readonly=True,
+    )
+    yield conn
+    conn.rollback()
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def pg_query(pg_conn):
+    """
+    Run a PREPARED_QUERIES entry by name and return its rows, preparing
+    the statement on first use. Each call runs under a savepoint, so a
+    missing table or column fails only the test that needs it and the
+    session snapshot stays usable.
+    """
+    prepared: set[str] = set()
+
+    def run(name: str) -> list[tuple]:
+        with pg_conn.cursor() as cur:
+            cur.execute("SAVEPOINT pg_query;")
+            try:
+                if name not in prepared:
+                    cur.execute(f"PREPARE {name} AS {PREPARED_QUERIES[name]};")
+                    # Prepared statements outlive a savepoint rollback
+                    prepared.add(name)
+                cur.execute(f"EXECUTE {name};")
+                rows = cur.fetchall()
+            except psycopg2.Error:
+                cur.execute("ROLLBACK TO SAVEPOINT pg_query;")
+                raise
+            cur.execute("RELEASE SAVEPOINT pg_query;")
+        return rows
+
+    return run
+
+
+@pytest.fixture(scope="session")
+def db_stats(pg_query) -> DbStats:
+    """
+    Flags for the orders / aggregation / audit checks, read from the
+    pipeline_health materialized view the DAG refreshes after each run.
+    """
+    return DbStats(*pg_query("pipeline_health")[0])
+
+
+@pytest.fixture(scope="session")
+def transformations():
+    """
+    include.transformations, imported on first use; each xdist worker
+    imports it once. Only the module itself (and pyarrow.compute) is
+    deferred: pandas is imported at the top of this conftest and the test
+    modules, so every run still pays for it.
+    """
+    return importlib.import_module("include.transformations")
+
+
+@pytest.fixture(scope="module")
+def sample_orders_df() -> pd.DataFrame:
+    """Raw sales rows with one duplicated order, built once per test module."""
+    return pd.DataFrame({
+        "order_id":    ["ord-001", "ord-002", "ord-001"],   # duplicate
+        "customer_id": ["c1", "c2", "c1"],
+        "product_id":  ["p1", "p2", "p1"],
+        "quantity":    [2, 1, 2],
+        "unit_price":  [999.99, 49.95, 999.99],
+        "discount":    [0.10, 0.0, 0.10],
+        "order_date":  ["2024-06-01", "2024-07-15", "2024-06-01"],
+        "status":      ["completed", "completed", "completed"],
+        "region":      ["north america", "europe", "north america"],
+    })
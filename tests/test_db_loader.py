@@ -0,0 +1,133 @@
+"""
+tests/test_db_loader.py
+=======================
+Unit tests for the PGCOPY binary writer in include/db_loader.py. The
+stream is parsed back in pure Python, so no PostgreSQL is required.
+"""
+
+from __future__ import annotations
+
+import struct
+from datetime import date, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from include.db_loader import ORDERS_COPY_SCHEMA, _orders_binary_writer
+
+PGCOPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+PG_EPOCH = date(2000, 1, 1)
+
+
+def _parse_pgcopy(data: bytes) -> list[list[bytes | None]]:
+    """Split a PGCOPY binary stream into rows of raw field payloads."""
+    assert data[:11] == PGCOPY_SIGNATURE
+    flags, ext_len = struct.unpack_from(">ii", data, 11)
+    assert (flags, ext_len) == (0, 0)
+    pos = 19
+
+    rows = []
+    while True:
+        (n_fields,) = struct.unpack_from(">h", data, pos)
+        pos += 2
+        if n_fields == -1:           # trailer
+            break
+        assert n_fields == len(ORDERS_COPY_SCHEMA)
+        row = []
+        for _ in range(n_fields):
+            (length,) = struct.unpack_from(">i", data, pos)
+            pos += 4
+            if length == -1:
+                row.append(None)
+                continue
+            row.append(data[pos:pos + length])
+            pos += length
+        rows.append(row)
+    assert pos == len(data), "trailing bytes after the PGCOPY trailer"
+    return rows
+
+
+def _decode(field: bytes | None, kind: str):
+    """Decode one raw field the way PostgreSQL reads its wire type."""
+    if field is None:
+        return None
+    if kind == "text":
+        return field.decode("utf-8")
+    if kind == "int4":
+        assert len(field) == 4
+        return struct.unpack(">i", field)[0]
+    if kind == "float8":
+        assert len(field) == 8
+        return struct.unpack(">d", field)[0]
+    assert len(field) == 4                 # date: int4 days since 2000-01-01
+    return PG_EPOCH + timedelta(days=struct.unpack(">i", field)[0])
+
+
+@pytest.fixture(scope="module")
+def orders_df() -> pd.DataFrame:
+    """
+    Cleaned-orders shaped frame, sliced so its index is not contiguous.
+    Covers NULLs, a pre-2000 date, categorical and Arrow dictionary text.
+    """
+    status = pa.array(
+        ["x", "completed", "x", "returned", "x", "completed"],
+    ).dictionary_encode()
+    df = pd.DataFrame(
+        {
+            "order_id":    ["skip-1", "o1", "skip-2", "o2", "skip-3", "o3"],
+            "customer_id": ["c0", "c1", "c0", "c2", "c0", "c3"],
+            "product_id":  ["p0", "p1", "p0", "p2", "p0", "p3"],
+            "quantity":    [9, 2, 9, 1, 9, 3],
+            "unit_price":  [0.0, 9.99, 0.0, 0.5, 0.0, 100.0],
+            "discount":    [0.0, 0.1, 0.0, None, 0.0, 0.0],
+            "order_date":  pd.array(
+                [date(2024, 1, 1), date(2024, 6, 1), date(2024, 1, 1),
+                 date(1999, 12, 31), date(2024, 1, 1), date(2000, 1, 1)],
+                dtype=pd.ArrowDtype(pa.date32()),
+            ),
+            "status":      pd.arrays.ArrowExtensionArray(status),
+            "region":      pd.Categorical(
+                ["x", "North America", "x", None, "x", "Zürich"],
+            ),
+        },
+        index=[10, 11, 12, 13, 14, 15],
+    )
+    return df.iloc[1::2]
+
+
+class TestOrdersBinaryWriterUnit:
+    """_orders_binary_writer must emit exactly what COPY ... FORMAT BINARY expects."""
+
+    def test_round_trip(self, orders_df):
+        rows = _parse_pgcopy(_orders_binary_writer(orders_df).getvalue())
+        decoded = [
+            tuple(_decode(field, kind) for field, kind in zip(row, ORDERS_COPY_SCHEMA.values()))
+            for row in rows
+        ]
+
+        assert decoded == [
+            ("o1", "c1", "p1", 2, 9.99, 0.1, date(2024, 6, 1), "completed", "North America"),
+            ("o2", "c2", "p2", 1, 0.5, None, date(1999, 12, 31), "returned", None),
+            ("o3", "c3", "p3", 3, 100.0, 0.0, date(2000, 1, 1), "completed", "Zürich"),
+        ]
+
+    def test_dates_are_days_since_pg_epoch(self, orders_df):
+        rows = _parse_pgcopy(_orders_binary_writer(orders_df).getvalue())
+        date_index = list(ORDERS_COPY_SCHEMA).index("order_date")
+
+        days = [struct.unpack(">i", row[date_index])[0] for row in rows]
+        assert days == [(date(2024, 6, 1) - PG_EPOCH).days, -1, 0]
+
+    def test_fixed_width_fields_are_big_endian(self, orders_df):
+        row = _parse_pgcopy(_orders_binary_writer(orders_df).getvalue())[0]
+        columns = list(ORDERS_COPY_SCHEMA)
+
+        assert row[columns.index("quantity")] == b"\x00\x00\x00\x02"
+        assert row[columns.index("unit_price")] == struct.pack(">d", 9.99)
+
+    def test_empty_frame_is_header_and_trailer(self, orders_df):
+        data = _orders_binary_writer(orders_df.iloc[:0]).getvalue()
+
+        assert _parse_pgcopy(data) == []
+        assert len(data) == 19 + 2
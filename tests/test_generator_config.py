@@ -0,0 +1,121 @@
+"""
+tests/test_generator_config.py
+==============================
+Unit tests for data-generator/config.py: .env parsing, type coercion and
+the combined validation error. No Docker required.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from dataclasses import fields
+from pathlib import Path
+
+import pytest
+
+GENERATOR_CONFIG = Path(__file__).resolve().parents[1] / "data-generator" / "config.py"
+
+VALID_ENV = {
+    "MINIO_ROOT_USER": "minioadmin",
+    "MINIO_ROOT_PASSWORD": "minioadmin123",
+    "MINIO_ENDPOINT": "http://minio:9000",
+}
+
+
+@pytest.fixture(scope="module")
+def gen_config():
+    """data-generator/config.py, loaded under its own name (it is not a package)."""
+    spec = importlib.util.spec_from_file_location("generator_config", GENERATOR_CONFIG)
+    module = importlib.util.module_from_spec(spec)
+    # dataclasses resolves string annotations through sys.modules
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def write_env(tmp_path, monkeypatch, gen_config):
+    """
+    Write a .env file and return its path, with every generator variable
+    cleared from os.environ so only the file is read.
+    """
+    for f in fields(gen_config.GeneratorSettings):
+        monkeypatch.delenv(f.name.upper(), raising=False)
+
+    def write(lines: list[str]) -> str:
+        path = tmp_path / ".env"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return str(path)
+
+    return write
+
+
+class TestGeneratorSettingsUnit:
+    """GeneratorSettings.from_env must coerce types and report every error at once."""
+
+    def test_values_are_parsed_and_coerced(self, gen_config, write_env):
+        env_file = write_env([
+            "# comment line",
+            "",
+            "minio_root_user=minioadmin",           # keys are case-insensitive
+            "MINIO_ROOT_PASSWORD='minioadmin123'",  # quotes stripped
+            'MINIO_ENDPOINT="http://minio:9000/"',
+            "GENERATOR_NUM_CUSTOMERS = 500",
+            "GENERATOR_SEED=7",
+        ])
+        s = gen_config.GeneratorSettings.from_env(env_file)
+
+        assert s.minio_root_user == "minioadmin"
+        assert s.minio_root_password == "minioadmin123"
+        assert s.minio_endpoint == "http://minio:9000"   # trailing slash stripped
+        assert s.generator_num_customers == 500
+        assert s.generator_seed == 7
+        assert s.generator_num_transactions == 10000     # default kept
+
+    def test_environment_overrides_env_file(self, gen_config, write_env, monkeypatch):
+        env_file = write_env([f"{k}={v}" for k, v in VALID_ENV.items()] + ["GENERATOR_SEED=1"])
+        monkeypatch.setenv("GENERATOR_SEED", "99")
+
+        assert gen_config.GeneratorSettings.from_env(env_file).generator_seed == 99
+
+    def test_missing_required_variable(self, gen_config, write_env):
+        env_file = write_env([
+            f"{k}={v}" for k, v in VALID_ENV.items() if k != "MINIO_ROOT_USER"
+        ])
+        with pytest.raises(ValueError, match="MINIO_ROOT_USER is required"):
+            gen_config.GeneratorSettings.from_env(env_file)
+
+    def test_bad_int(self, gen_config, write_env):
+        env_file = write_env([f"{k}={v}" for k, v in VALID_ENV.items()] + ["GENERATOR_SEED=abc"])
+        with pytest.raises(ValueError, match="GENERATOR_SEED must be an integer, got 'abc'"):
+            gen_config.GeneratorSettings.from_env(env_file)
+
+    def test_parse_errors_reported_together(self, gen_config, write_env):
+        env_file = write_env([
+            "MINIO_ROOT_PASSWORD=minioadmin123",
+            "GENERATOR_NUM_CUSTOMERS=lots",
+        ])
+        with pytest.raises(ValueError) as exc_info:
+            gen_config.GeneratorSettings.from_env(env_file)
+
+        message = str(exc_info.value)
+        assert message.startswith("Invalid generator settings:")
+        assert "MINIO_ROOT_USER is required" in message
+        assert "MINIO_ENDPOINT is required" in message
+        assert "GENERATOR_NUM_CUSTOMERS must be an integer, got 'lots'" in message
+
+    def test_validation_errors_reported_together(self, gen_config, write_env):
+        env_file = write_env([
+            "MINIO_ROOT_USER=minioadmin",
+            "MINIO_ROOT_PASSWORD=short",
+            "MINIO_ENDPOINT=minio:9000",
+            "GENERATOR_NUM_CUSTOMERS=5",
+        ])
+        with pytest.raises(ValueError) as exc_info:
+            gen_config.GeneratorSettings.from_env(env_file)
+
+        message = str(exc_info.value)
+        assert "MINIO_ROOT_PASSWORD must be at least 8 characters" in message
+        assert "GENERATOR_NUM_CUSTOMERS must be between 10 and 1000000" in message
+        assert "MINIO_ENDPOINT must start with http:// or https://" in message